@@ -1,6 +1,8 @@
 # ai_toolkit.py
 from transformers import pipeline
 
+from prefix_cache import PromptPrefixCache
+
 class AIToolkit:
     def __init__(self):
         print("🔧 Loading AI toolkit...")
@@ -10,11 +12,35 @@ class AIToolkit:
         self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
         self.sentiment_analyzer = pipeline("sentiment-analysis")
         self.qa_system = pipeline("question-answering")
+        self.prefix_cache = PromptPrefixCache()
         
         print("✅ All tools ready!")
     
-    def write_with_me(self, prompt):
-        """Creative writing assistant"""
+    def write_with_me(self, prompt, prefix=""):
+        """Creative writing assistant
+
+        Pass a shared system-style text as prefix to reuse its cached
+        attention state across calls. A space is added between prefix and
+        prompt when neither side has whitespace there. The prefix is not
+        included in the returned text.
+        """
+        if prefix:
+            separator = ""
+            if not prefix[-1].isspace() and not prompt[:1].isspace():
+                separator = " "
+            tokenizer = self.text_generator.tokenizer
+            result = self.prefix_cache.generate(
+                self.text_generator.model,
+                tokenizer,
+                prefix,
+                separator + prompt,
+                # Same continuation length as the no-prefix path below
+                max_new_tokens=max(100 - len(tokenizer.encode(prompt)), 1),
+                temperature=0.8,
+                do_sample=True
+            )
+            return result['generated_text'][len(separator):]
+
         result = self.text_generator(
             prompt, 
             max_length=100, 
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Latency-aware routing across the GPT-2 model family
+"""
+
+import threading
+import time
+
+
+class LatencyAwareRouter:
+    # Ordered from lowest to highest quality. The tokens/sec values are rough
+    # CPU priors used until real measurements come in.
+    MODEL_TIERS = [
+        {"name": "distilgpt2", "quality": 1, "prior_tokens_per_sec": 60.0},
+        {"name": "gpt2", "quality": 2, "prior_tokens_per_sec": 40.0},
+        {"name": "gpt2-medium", "quality": 3, "prior_tokens_per_sec": 15.0},
+        {"name": "gpt2-large", "quality": 4, "prior_tokens_per_sec": 7.0},
+    ]
+
+    def __init__(self, smoothing=0.3, overhead_sec=0.05, max_queue_depth=4,
+                 max_decisions=100):
+        self.smoothing = smoothing
+        self.overhead_sec = overhead_sec
+        self.max_queue_depth = max_queue_depth
+        self.max_decisions = max_decisions
+        self.lock = threading.Lock()
+        self.decisions = []
+        self.stats = {
+            tier["name"]: {
+                "tokens_per_sec": tier["prior_tokens_per_sec"],
+                "queue_depth": 0,
+                "samples": 0,
+                "available": True,
+            }
+            for tier in self.MODEL_TIERS
+        }
+
+    def estimate_latency(self, model_name, num_tokens):
+        """Estimate seconds until a new request on this model finishes"""
+        stats = self.stats[model_name]
+        # Requests already in flight on this model run ahead of the new one
+        waiting_tokens = num_tokens * (stats["queue_depth"] + 1)
+        return self.overhead_sec + waiting_tokens / stats["tokens_per_sec"]
+
+    def total_queue_depth(self):
+        """Count requests currently in flight across all models"""
+        return sum(stats["queue_depth"] for stats in self.stats.values())
+
+    def choose_model(self, latency_budget, num_tokens):
+        """Pick the best model expected to finish within the latency budget"""
+        with self.lock:
+            available = [
+                tier for tier in self.MODEL_TIERS
+                if self.stats[tier["name"]]["available"]
+            ]
+            if not available:
+                raise RuntimeError("No models available for routing")
+
+            overloaded = self.total_queue_depth() >= self.max_queue_depth
+            candidates = available
+            if overloaded:
+                # Shed load: only the two smallest models take new work
+                candidates = available[:2]
+
+            estimates = {
+                tier["name"]: self.estimate_latency(tier["name"], num_tokens)
+                for tier in candidates
+            }
+
+            chosen = None
+            for tier in reversed(candidates):
+                if estimates[tier["name"]] <= latency_budget:
+                    chosen = tier["name"]
+                    break
+
+            reason = "overloaded" if overloaded else "within budget"
+            if chosen is None:
+                # Nothing fits, so go with whatever should finish first
+                chosen = min(estimates, key=estimates.get)
+                reason = "budget miss"
+
+            self.stats[chosen]["queue_depth"] += 1
+
+            decision = {
+                "timestamp": time.time(),
+                "model": chosen,
+                "reason": reason,
+                "latency_budget": latency_budget,
+                "num_tokens": num_tokens,
+                "estimated_latency": estimates[chosen],
+                "actual_latency": None,
+            }
+            self.decisions.append(decision)
+            if len(self.decisions) > self.max_decisions:
+                self.decisions.pop(0)
+
+        return decision
+
+    def record_result(self, decision, tokens_generated, elapsed):
+        """Feed a finished request back into the live latency model"""
+        with self.lock:
+            stats = self.stats[decision["model"]]
+            stats["queue_depth"] = max(stats["queue_depth"] - 1, 0)
+            decision["actual_latency"] = elapsed
+
+            generation_time = elapsed - self.overhead_sec
+            if tokens_generated <= 0 or generation_time <= 0:
+                return
+
+            measured = tokens_generated / generation_time
+            if stats["samples"] == 0:
+                stats["tokens_per_sec"] = measured
+            else:
+                stats["tokens_per_sec"] = (
+                    self.smoothing * measured
+                    + (1 - self.smoothing) * stats["tokens_per_sec"]
+                )
+            stats["samples"] += 1
+
+    def cancel_request(self, decision):
+        """Release a request that failed before generating anything"""
+        with self.lock:
+            stats = self.stats[decision["model"]]
+            stats["queue_depth"] = max(stats["queue_depth"] - 1, 0)
+            decision["reason"] += ", failed"
+
+    def mark_unavailable(self, model_name):
+        """Stop routing to a model that failed to load"""
+        with self.lock:
+            self.stats[model_name]["available"] = False
+
+    def display_routing_report(self):
+        """Display the live latency model and recent routing decisions"""
+        print("📡 Live latency model:")
+        for tier in self.MODEL_TIERS:
+            stats = self.stats[tier["name"]]
+            source = "measured" if stats["samples"] else "prior"
+            if not stats["available"]:
+                source += ", unavailable"
+            print(f"  • {tier['name']}: {stats['tokens_per_sec']:.1f} tokens/sec "
+                  f"({source}), queue depth {stats['queue_depth']}")
+
+        if not self.decisions:
+            print("\n🧭 No routing decisions yet")
+            return
+
+        print(f"\n🧭 Routing decisions ({len(self.decisions)}):")
+        for decision in self.decisions:
+            actual = decision["actual_latency"]
+            actual_text = f"{actual:.2f}s" if actual is not None else "pending"
+            print(f"  • {decision['model']} for {decision['latency_budget']:.2f}s budget "
+                  f"[{decision['reason']}] - estimated "
+                  f"{decision['estimated_latency']:.2f}s, actual {actual_text}")
+
+
+def main():
+    """Simulate several requests in flight to show load shedding and learning"""
+    print("🧭 Latency-aware router simulation")
+    print("=" * 40)
+
+    router = LatencyAwareRouter(max_queue_depth=3)
+    latency_budget = 30.0
+    num_tokens = 200
+
+    # Five requests arrive before any of them finishes
+    print(f"\n📥 5 concurrent requests, {latency_budget:.0f}s budget, {num_tokens} tokens each:")
+    in_flight = []
+    for i in range(5):
+        decision = router.choose_model(latency_budget, num_tokens)
+        in_flight.append(decision)
+        print(f"  {i + 1}. {decision['model']} [{decision['reason']}] - "
+              f"queue depth now {router.total_queue_depth()}")
+
+    shed = [d for d in in_flight if d["reason"] == "overloaded"]
+    shed_to_small = all(d["model"] in ("distilgpt2", "gpt2") for d in shed)
+    print(f"\n{'✅' if shed and shed_to_small else '❌'} "
+          f"{len(shed)} requests shed to small models once the queue was full")
+
+    # Finish the gpt2 requests at 100 and then 50 tokens/sec
+    gpt2_requests = [d for d in in_flight if d["model"] == "gpt2"]
+    smoothing = router.smoothing
+    expected = [100.0, smoothing * 50.0 + (1 - smoothing) * 100.0]
+    for decision, speed, want in zip(gpt2_requests, [100.0, 50.0], expected):
+        router.record_result(decision, num_tokens, router.overhead_sec + num_tokens / speed)
+        got = router.stats["gpt2"]["tokens_per_sec"]
+        print(f"{'✅' if abs(got - want) < 1e-6 else '❌'} gpt2 measured at {speed:.0f} "
+              f"tokens/sec -> estimate {got:.1f} (expected {want:.1f})")
+
+    # The rest finish at speeds that fit their model size
+    true_speeds = {"distilgpt2": 80.0, "gpt2": 50.0, "gpt2-medium": 20.0, "gpt2-large": 9.0}
+    for decision in in_flight:
+        if decision["actual_latency"] is None:
+            speed = true_speeds[decision["model"]]
+            router.record_result(decision, num_tokens, router.overhead_sec + num_tokens / speed)
+    print(f"{'✅' if router.total_queue_depth() == 0 else '❌'} "
+          f"queue drained to {router.total_queue_depth()}")
+
+    # A model that fails to load is released and never picked again
+    decision = router.choose_model(latency_budget, num_tokens)
+    router.cancel_request(decision)
+    router.mark_unavailable(decision["model"])
+    retry = router.choose_model(latency_budget, num_tokens)
+    speed = true_speeds[retry["model"]]
+    router.record_result(retry, num_tokens, router.overhead_sec + num_tokens / speed)
+    print(f"{'✅' if retry['model'] != decision['model'] else '❌'} "
+          f"{decision['model']} marked unavailable, next request went to {retry['model']}")
+
+    print()
+    router.display_routing_report()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 # smart_writer_improved.py
-from transformers import pipeline
+from transformers import AutoTokenizer, pipeline
 import re
+import threading
+import time
+
+from model_router import LatencyAwareRouter
 
 class ImprovedWritingAssistant:
-    def __init__(self, model_name="distilgpt2"):
+    BRAINSTORM_MAX_LENGTH = 80
+
+    def __init__(self, model_name="distilgpt2", allow_fallback=True):
         print("🤖 Starting up your improved AI writing buddy...")
         print(f"📦 Using model: {model_name}")
 
@@ -26,6 +32,9 @@ class ImprovedWritingAssistant:
             )
             print("✅ Ready to help with better writing!")
         except Exception as e:
+            if not allow_fallback:
+                print(f"❌ Could not load {model_name}")
+                raise
             print(f"⚠️  Could not load {model_name}, falling back to GPT-2")
             self.generator = pipeline(
                 "text-generation",
@@ -53,35 +62,48 @@ class ImprovedWritingAssistant:
     
     def brainstorm_ideas(self, topic):
         """Generate ideas with improved prompts and cleaning"""
-        
-        # Better structured prompts
-        prompts = [
-            f"Mac productivity tip: Use",
-            f"To improve {topic}, try",
-            f"Quick {topic} hack:"
-        ]
+        ideas, _ = self.brainstorm_ideas_with_count(topic)
+        return ideas
+
+    def brainstorm_ideas_with_count(self, topic):
+        """Generate ideas and count the new tokens produced for them"""
         
         ideas = []
-        for prompt in prompts:
+        tokens_generated = 0
+        for prompt in self.brainstorm_prompts(topic):
             try:
                 result = self.generator(
                     prompt,
-                    max_length=80,
+                    max_length=self.BRAINSTORM_MAX_LENGTH,
                     temperature=0.6,  # Lower temperature for more focused output
                     do_sample=True,
                     pad_token_id=50256
                 )
                 
                 generated_text = result[0]['generated_text']
+                tokens_generated += (
+                    len(self.generator.tokenizer.encode(generated_text))
+                    - len(self.generator.tokenizer.encode(prompt))
+                )
                 clean_text = self.clean_output(generated_text)
                 ideas.append(clean_text)
                 
             except Exception as e:
                 ideas.append(f"Could not generate idea: {str(e)}")
         
-        return ideas
+        return ideas, tokens_generated
+
+    @staticmethod
+    def brainstorm_prompts(topic):
+        """Better structured prompts for brainstorming"""
+        return [
+            f"Mac productivity tip: Use",
+            f"To improve {topic}, try",
+            f"Quick {topic} hack:"
+        ]
     
-    def get_curated_tips(self, topic):
+    @staticmethod
+    def get_curated_tips(topic):
         """Provide curated tips as fallback"""
         mac_tips = {
             "productivity hacks on a mac": [
@@ -107,6 +129,72 @@ class ImprovedWritingAssistant:
         
         return ["No specific tips available for this topic"]
 
+class RoutedWritingAssistant:
+    """Routes each request to the best model expected to meet its latency budget
+
+    The REPL sends one request at a time, so load shedding only kicks in when
+    brainstorm_ideas is called from several threads at once.
+    """
+
+    def __init__(self, router=None):
+        self.router = router or LatencyAwareRouter()
+        # All GPT-2 models share one tokenizer, so budgets can be sized
+        # before the routed model is loaded
+        self.tokenizer = AutoTokenizer.from_pretrained("gpt2")
+        self.assistants = {}
+        self.lock = threading.Lock()
+
+    def get_assistant(self, model_name):
+        """Load a model the first time the router picks it"""
+        with self.lock:
+            if model_name not in self.assistants:
+                # A silent gpt2 fallback would be measured as the routed model
+                self.assistants[model_name] = ImprovedWritingAssistant(
+                    model_name,
+                    allow_fallback=False
+                )
+            return self.assistants[model_name]
+
+    def brainstorm_tokens(self, topic):
+        """Count the new tokens a brainstorm can generate across its prompts"""
+        max_length = ImprovedWritingAssistant.BRAINSTORM_MAX_LENGTH
+        return sum(
+            max(max_length - len(self.tokenizer.encode(prompt)), 0)
+            for prompt in ImprovedWritingAssistant.brainstorm_prompts(topic)
+        )
+
+    def brainstorm_ideas(self, topic, latency_budget=5.0):
+        """Generate ideas on the best model that should finish within budget"""
+        num_tokens = self.brainstorm_tokens(topic)
+        decision = self.router.choose_model(latency_budget, num_tokens)
+        print(f"🧭 Routed to {decision['model']} ({decision['reason']}, "
+              f"~{decision['estimated_latency']:.1f}s expected)")
+
+        # Load time is a one-off cost and must not skew the latency model
+        try:
+            assistant = self.get_assistant(decision["model"])
+        except Exception:
+            self.router.cancel_request(decision)
+            self.router.mark_unavailable(decision["model"])
+            raise
+
+        tokens_generated = 0
+        start_time = time.time()
+        try:
+            ideas, tokens_generated = assistant.brainstorm_ideas_with_count(topic)
+        finally:
+            elapsed = time.time() - start_time
+            self.router.record_result(decision, tokens_generated, elapsed)
+        return ideas
+
+    def get_curated_tips(self, topic):
+        """Curated tips do not need a model"""
+        return ImprovedWritingAssistant.get_curated_tips(topic)
+
+    def display_routing_report(self):
+        """Show the routing decisions made so far"""
+        self.router.display_routing_report()
+
 def main():
     print("🤖 AI Writing Assistant")
     print("=" * 30)
@@ -117,8 +205,9 @@ def main():
     print("2. gpt2 (Original - 500MB, basic quality)")
     print("3. gpt2-medium (1.5GB, better quality)")
     print("4. gpt2-large (3GB, best quality)")
+    print("5. auto (route each request by latency budget)")
 
-    choice = input("\nChoose model (1-4) or press Enter for default: ").strip()
+    choice = input("\nChoose model (1-5) or press Enter for default: ").strip()
 
     model_map = {
         "1": "distilgpt2",
@@ -128,12 +217,19 @@ def main():
         "": "distilgpt2"  # default
     }
 
-    model_name = model_map.get(choice, "distilgpt2")
-
-    assistant = ImprovedWritingAssistant(model_name)
+    routed = choice == "5"
+    if routed:
+        assistant = RoutedWritingAssistant()
+    else:
+        model_name = model_map.get(choice, "distilgpt2")
+        assistant = ImprovedWritingAssistant(model_name)
 
     print("\n🚀 What can I help you write today?")
-    print("Commands: 'brainstorm', 'curated', 'quit'")
+    if routed:
+        commands = "'brainstorm', 'curated', 'routing', 'quit'"
+    else:
+        commands = "'brainstorm', 'curated', 'quit'"
+    print(f"Commands: {commands}")
     
     while True:
         command = input("\n> ").strip().lower()
@@ -144,8 +240,17 @@ def main():
             
         elif command == 'brainstorm':
             topic = input("What topic? ")
+            if routed:
+                budget = input("Latency budget in seconds (Enter for 5): ").strip()
+                try:
+                    latency_budget = float(budget) if budget else 5.0
+                except ValueError:
+                    print("❌ Invalid budget, using 5 seconds")
+                    latency_budget = 5.0
+                ideas = assistant.brainstorm_ideas(topic, latency_budget)
+            else:
+                ideas = assistant.brainstorm_ideas(topic)
             print(f"\n🎯 AI-generated ideas about '{topic}':")
-            ideas = assistant.brainstorm_ideas(topic)
             for i, idea in enumerate(ideas, 1):
                 print(f"{i}. {idea}")
                 
@@ -155,9 +260,12 @@ def main():
             tips = assistant.get_curated_tips(topic)
             for i, tip in enumerate(tips, 1):
                 print(f"{i}. {tip}")
+
+        elif command == 'routing' and routed:
+            assistant.display_routing_report()
                 
         else:
-            print("Try 'brainstorm', 'curated', or 'quit'")
+            print(f"Try {commands}")
 
 if __name__ == "__main__":
     main()